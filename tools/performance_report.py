@@ -0,0 +1,404 @@
+#!/usr/bin/env python3
+"""Performance report generator for OpenEMS host-test logs.
+
+Scans a test log for `TIMING:`, `PERF:` and `Running test:` markers and
+renders a standalone HTML summary page.
+
+Log line formats:
+    Running test: <name>
+    TIMING: <name> = <value> <unit>
+    PERF: <name> = <value> <unit> +/- <tolerance>
+
+Usage: python3 tools/performance_report.py LOG [-o report.html]
+
+Fully typed so it compiles unmodified with mypyc for a compiled-speed
+parse/render path; the repo ships it as a plain script and the compile
+step stays optional.
+"""
+from __future__ import annotations
+
+import argparse
+import array
+import math
+import mmap
+import os
+import re
+import sys
+from datetime import datetime
+from string import Template
+from typing import Callable, Final
+
+# The marker patterns are regular (no backreferences/lookaround), so they
+# gain nothing from the stdlib's backtracking engine. Use Google's RE2
+# (linear-time DFA, pip install google-re2) when installed.
+try:
+    import re2 as _re  # type: ignore[import-untyped]
+except ImportError:
+    _re = re
+
+# Optional Hyperscan backend for very large logs: all markers compile
+# into one SIMD-accelerated database scanned in a single pass.
+try:
+    import hyperscan
+except ImportError:
+    hyperscan = None  # type: ignore[assignment]
+
+# Compiled once at import; parse_test_log may run per CI stage.
+# Byte patterns: the log is scanned through an mmap, no str decode of the
+# full file — only the small captured groups get decoded.
+# All three markers share one alternation so everything is collected in
+# a single pass over the mapping (and in log order) instead of one full
+# scan per pattern.
+# [ \t] instead of \s keeps matches line-local: \s also eats newlines,
+# which lets a truncated marker line bleed into the next one and widens
+# the engine's search states.
+_ALL_RE: Final = _re.compile(
+    rb"TIMING:[ \t]*(?P<t_name>\w+)[ \t]*="
+    rb"[ \t]*(?P<t_int>\d+)(?:\.(?P<t_frac>\d+))?[ \t]*(?P<t_unit>\w+)"
+    rb"|PERF:[ \t]*(?P<p_name>\w+)[ \t]*="
+    rb"[ \t]*(?P<p_int>\d+)(?:\.(?P<p_frac>\d+))?[ \t]*(?P<p_unit>\w+)"
+    rb"[ \t]*\+/-[ \t]*(?P<pt_int>\d+)(?:\.(?P<pt_frac>\d+))?"
+    rb"|Running test:[ \t]*(?P<tc>\w+)")
+
+
+def _group_num(name: str) -> int:
+    # google-re2 keys bytes-pattern group names by bytes, the stdlib by
+    # str; resolve each name to its numeric index once so match.group()
+    # works under either engine.
+    gi = _ALL_RE.groupindex
+    return int(gi[name] if name in gi else gi[name.encode("ascii")])
+
+
+_T_NAME: Final = _group_num("t_name")
+_T_INT: Final = _group_num("t_int")
+_T_FRAC: Final = _group_num("t_frac")
+_T_UNIT: Final = _group_num("t_unit")
+_P_NAME: Final = _group_num("p_name")
+_P_INT: Final = _group_num("p_int")
+_P_FRAC: Final = _group_num("p_frac")
+_P_UNIT: Final = _group_num("p_unit")
+_PT_INT: Final = _group_num("pt_int")
+_PT_FRAC: Final = _group_num("pt_frac")
+_TC: Final = _group_num("tc")
+
+# CI logs are append-only and only the latest run matters; by default only
+# the last 1 MiB is scanned (0 = whole file).
+DEFAULT_TAIL_BYTES: Final = 1_048_576
+
+# Status is baked in: nothing sets a per-metric fail yet. If that ever
+# changes, add a _ROW_FAIL variant and pick the template per metric.
+_ROW_TMPL: Final = ('<tr><td>{}</td><td>{}</td><td>{}</td><td>{}</td>'
+                    '<td class="pass">✓ PASS</td></tr>\n')
+_TC_TMPL: Final = "<li>{}</li>\n"
+
+# Log-sourced strings go straight into markup; escape them. A translate
+# table is a single C pass, vs html.escape's four .replace calls.
+_HTML_ESCAPE: Final[dict[int, str]] = str.maketrans(
+    {"&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;"})
+
+_HS_DB = None
+if hyperscan is not None:
+    _HS_DB = hyperscan.Database()
+    _HS_DB.compile(
+        expressions=(rb"TIMING:[^\n]+", rb"PERF:[^\n]+",
+                     rb"Running test:[ \t]*\w+"),
+        ids=(0, 1, 2),
+        elements=3,
+        flags=(hyperscan.HS_FLAG_SOM_LEFTMOST,) * 3)
+
+
+class PerformanceReport:
+    # Struct-of-arrays: large logs produce tens of thousands of metrics,
+    # and the render loop only ever walks them sequentially. Parallel
+    # arrays beat one boxed object per metric on both memory and cache.
+    def __init__(self) -> None:
+        self.names: list[str] = []
+        self.values = array.array("d")
+        self.units: list[str] = []
+        self.tolerances = array.array("d")
+        self.test_cases: list[str] = []
+        self.log_missing: bool = False
+        self.start_time: datetime = datetime.now()
+        self.end_time: datetime = self.start_time
+
+    def add_metric(self, name: str, value: float, unit: str,
+                   tolerance: float = 0.0) -> None:
+        self.names.append(name)
+        self.values.append(value)
+        self.units.append(unit)
+        self.tolerances.append(tolerance)
+
+    def add_test_case(self, name: str) -> None:
+        self.test_cases.append(name)
+
+    def metric_count(self) -> int:
+        return len(self.names)
+
+    def finalize(self) -> None:
+        self.end_time = datetime.now()
+
+
+def _fast_float(intpart: bytes, fracpart: bytes | None) -> float:
+    # The patterns guarantee plain unsigned decimals, so skip float()'s
+    # full parser (sign/exponent/inf/nan handling) and combine the two
+    # int conversions directly. The fraction uses big-int true division
+    # (a proper fraction cannot overflow); only converting an absurdly
+    # long integer part can, and float() would have said inf there too.
+    try:
+        if not fracpart:
+            return float(int(intpart))
+        divisor: int = 10 ** len(fracpart)
+        return int(intpart) + int(fracpart) / divisor
+    except OverflowError:
+        return math.inf
+
+
+def _record_metric(add_metric: Callable[..., None],
+                   match: re.Match[bytes]) -> None:
+    # Takes the bound add_metric so callers hoist the attribute lookup out
+    # of their match loops.
+    name = match.group(_T_NAME)
+    if name is not None:
+        add_metric(name.decode("ascii"),
+                   _fast_float(match.group(_T_INT), match.group(_T_FRAC)),
+                   match.group(_T_UNIT).decode("ascii"))
+    else:
+        add_metric(match.group(_P_NAME).decode("ascii"),
+                   _fast_float(match.group(_P_INT), match.group(_P_FRAC)),
+                   match.group(_P_UNIT).decode("ascii"),
+                   _fast_float(match.group(_PT_INT),
+                               match.group(_PT_FRAC)))
+
+
+def _count(content: mmap.mmap, needle: bytes, pos: int) -> int:
+    # mmap has no .count(); chain C-level find calls instead. One
+    # iteration per occurrence, so the Python overhead stays negligible.
+    n = 0
+    i = content.find(needle, pos)
+    while i >= 0:
+        n += 1
+        i = content.find(needle, i + len(needle))
+    return n
+
+
+def _scan_hyperscan(content: mmap.mmap, pos: int,
+                    report: PerformanceReport) -> None:
+    # Hyperscan reports offsets only (and possibly several end offsets per
+    # line), so collect unique match starts from the single database scan
+    # and re-run the capture patterns just on those spots. The tail slice
+    # is copied once because the scanner needs a bytes buffer.
+    db = _HS_DB
+    assert db is not None  # callers check before dispatching here
+    data = content[pos:]
+    starts: set[tuple[int, int]] = set()
+    db.scan(data, match_event_handler=lambda pat_id, s, e, flags, ctx:
+            starts.add((s, pat_id)))
+    add_metric = report.add_metric
+    add_test_case = report.add_test_case
+    for s, _pat_id in sorted(starts):
+        match = _ALL_RE.match(data, s)
+        if match is None:
+            continue
+        tc = match.group(_TC)
+        if tc is not None:
+            add_test_case(tc.decode("ascii"))
+        else:
+            _record_metric(add_metric, match)
+
+
+def parse_test_log(log_file: str,
+                   tail_bytes: int = DEFAULT_TAIL_BYTES) -> PerformanceReport:
+    report = PerformanceReport()
+    try:
+        fd = os.open(log_file, os.O_RDONLY)
+    except FileNotFoundError:
+        print(f"performance-report: no such log: {log_file}", file=sys.stderr)
+        report.log_missing = True
+        return report
+
+    try:
+        size = os.fstat(fd).st_size
+        if size == 0:
+            report.finalize()
+            return report
+        # Map only the tail slice; the mmap offset must be page-aligned, so
+        # round down and skip the slack via the scan start position.
+        start = max(0, size - tail_bytes) if tail_bytes > 0 else 0
+        offset = start - (start % mmap.ALLOCATIONGRANULARITY)
+        # Demand-paged by the kernel: no read syscall loop, no user-space
+        # copy, no full-file str decode.
+        content = mmap.mmap(fd, size - offset, offset=offset,
+                            access=mmap.ACCESS_READ)
+    finally:
+        os.close(fd)
+
+    try:
+        if hasattr(content, "madvise"):
+            content.madvise(mmap.MADV_SEQUENTIAL)
+
+        pos = start - offset
+        if start > 0:
+            # Discard the partial first line whenever the scan does not
+            # begin at file offset 0 (pos alone is 0 when the cut lands
+            # exactly on an allocation-granularity boundary).
+            nl = content.find(b"\n", pos)
+            pos = nl + 1 if nl >= 0 else len(content)
+
+        if _HS_DB is not None:
+            _scan_hyperscan(content, pos, report)
+        else:
+            # Substring counting runs at memchr speed, far cheaper than
+            # the regex engine; most CI logs contain none of these markers,
+            # and the counts size the arrays exactly — no append-driven
+            # doubling reallocations, no over-allocated headroom.
+            n_m = (_count(content, b"TIMING:", pos)
+                   + _count(content, b"PERF:", pos))
+            n_tc = _count(content, b"Running test:", pos)
+            if n_m or n_tc:
+                names = [""] * n_m
+                units = [""] * n_m
+                values = array.array("d", bytes(8 * n_m))
+                tolerances = array.array("d", bytes(8 * n_m))
+                cases = [""] * n_tc
+                im = itc = 0
+                for match in _ALL_RE.finditer(content, pos):
+                    name = match.group(_T_NAME)
+                    if name is not None:
+                        names[im] = name.decode("ascii")
+                        values[im] = _fast_float(match.group(_T_INT),
+                                                 match.group(_T_FRAC))
+                        units[im] = match.group(_T_UNIT).decode("ascii")
+                        im += 1
+                    elif match.group(_TC) is not None:
+                        cases[itc] = match.group(_TC).decode("ascii")
+                        itc += 1
+                    else:
+                        names[im] = match.group(_P_NAME).decode("ascii")
+                        values[im] = _fast_float(match.group(_P_INT),
+                                                 match.group(_P_FRAC))
+                        units[im] = match.group(_P_UNIT).decode("ascii")
+                        tolerances[im] = _fast_float(match.group(_PT_INT),
+                                                     match.group(_PT_FRAC))
+                        im += 1
+                if im != n_m:
+                    # Markers on malformed lines counted but didn't match.
+                    del names[im:], units[im:]
+                    values = values[:im]
+                    tolerances = tolerances[:im]
+                del cases[itc:]
+                report.names = names
+                report.values = values
+                report.units = units
+                report.tolerances = tolerances
+                report.test_cases = cases
+    finally:
+        content.close()
+
+    report.finalize()
+    return report
+
+
+_HEAD_TMPL: Final = Template("""<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>OpenEMS Performance Report</title>
+<style>
+body { font-family: monospace; margin: 2em; background: #1b1b1b; color: #ddd; }
+h1 { color: #6cf; }
+table { border-collapse: collapse; margin: 1em 0; }
+th, td { border: 1px solid #444; padding: 4px 10px; text-align: left; }
+th { background: #2a2a2a; }
+.pass { color: #6f6; }
+.fail { color: #f66; }
+ul { line-height: 1.5; }
+</style>
+</head>
+<body>
+<h1>OpenEMS Performance Report</h1>
+<p>Generated: $timestamp<br>Duration: $duration</p>
+<h2>Metrics ($metric_count)</h2>
+<table>
+<tr><th>Name</th><th>Value</th><th>Unit</th><th>Tolerance</th><th>Status</th></tr>
+""")
+
+_MID_TMPL: Final = Template("""</table>
+<h2>Test cases ($test_count)</h2>
+<ul>
+""")
+
+_TAIL: Final = """</ul>
+</body>
+</html>
+"""
+
+# Static placeholder for empty/missing logs; skips all substitution work.
+_EMPTY_HTML: Final = """<!DOCTYPE html>
+<html>
+<head><meta charset="utf-8"><title>OpenEMS Performance Report</title></head>
+<body>
+<h1>OpenEMS Performance Report</h1>
+<p>No metrics or test cases found in the log.</p>
+</body>
+</html>
+"""
+
+
+def generate_html_report(report: PerformanceReport, output_file: str) -> None:
+    if not report.names and not report.test_cases:
+        # Missing or markerless log: emit the static placeholder page and
+        # skip all template substitution.
+        with open(output_file, "w", encoding="utf-8") as f:
+            f.write(_EMPTY_HTML)
+        return
+
+    # Stream head -> rows -> tail; the report never exists as one big str
+    # and peak memory stays independent of the metric count.
+    with open(output_file, "w", encoding="utf-8") as f:
+        # finalize() already stamped end_time; no second clock read.
+        f.write(_HEAD_TMPL.substitute(
+            timestamp=report.end_time.strftime("%Y-%m-%d %H:%M:%S"),
+            duration=str(report.end_time - report.start_time),
+            metric_count=report.metric_count(),
+        ))
+        f.writelines(
+            _ROW_TMPL.format(name.translate(_HTML_ESCAPE), value,
+                             unit.translate(_HTML_ESCAPE), tolerance)
+            for name, value, unit, tolerance in zip(report.names,
+                                                    report.values,
+                                                    report.units,
+                                                    report.tolerances))
+        f.write(_MID_TMPL.substitute(test_count=len(report.test_cases)))
+        f.writelines(
+            _TC_TMPL.format(tc.translate(_HTML_ESCAPE))
+            for tc in report.test_cases)
+        f.write(_TAIL)
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("log", help="test log to scan")
+    ap.add_argument("-o", "--output", default="performance_report.html",
+                    help="output HTML file (default: %(default)s)")
+    ap.add_argument("--tail-bytes", type=int, default=DEFAULT_TAIL_BYTES,
+                    help="scan only the last N bytes of the log; "
+                         "0 scans the whole file (default: %(default)s)")
+    args = ap.parse_args()
+
+    report = parse_test_log(args.log, args.tail_bytes)
+    generate_html_report(report, args.output)
+    if report.log_missing:
+        # Placeholder page was still written, but a missing log is a CI
+        # failure, not a clean empty run.
+        return 1
+    if not report.names and not report.test_cases:
+        print(f"performance-report: no markers found, "
+              f"placeholder page -> {args.output}")
+    else:
+        print(f"performance-report: {report.metric_count()} metric(s), "
+              f"{len(report.test_cases)} test case(s) -> {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())